@@ -22,16 +22,15 @@
 # reboot/shutdown commands, and rudimentary disk i/o indication.
 #
 # Requirements: python3-pip python3-pil python3-smbus i2c-tools psutil
-# tzlocal adafruit-circuitpython-ssd1306
+# adafruit-circuitpython-ssd1306
 
 import argparse
+import asyncio
+import functools
 import logging
+import os
+import socket
 import time
-import tzlocal
-from datetime import datetime
-from datetime import timedelta
-import re
-import subprocess
 import adafruit_ssd1306
 from board import SCL, SDA
 import busio
@@ -42,13 +41,13 @@ from gpiozero import PWMLED, Button
 
 
 parser = argparse.ArgumentParser(description='Simple python3 script to control a monochrome ssd1306 based oled, LED, and button.',
-                                 epilog='The shorter the button poll interval the more responsive the button will be, but more CPU time will be used by the script.'
+                                 epilog='The shorter the I/O poll interval the more responsive the LED will be, but more CPU time will be used by the script.'
                                 )
 parser.add_argument('-i', '--interval',
                     action='store',
                     type=float,
-                    default=0.4,
-                    help='Button poll interval in seconds. Default: 0.4'
+                    default=1.0,
+                    help='Disk I/O poll interval in seconds. Default: 1.0'
                    )
 parser.add_argument('-t', '--timer',
                     action='store',
@@ -83,20 +82,26 @@ args = parser.parse_args()
 
 VERSION = "0.3"
 
-led = PWMLED(args.led)
-button = Button(args.button)
-
 logging.basicConfig(level=args.debug)
 logging.debug(args)
 
-# I/O activity source
-IOFILE = '/proc/diskstats'
-IO_FIELD = 12
-
-# Balancing button responsiveness, and resource consumption. Defualt: 0.4s
+# Only count real disks, loop and ram devices are skipped. Their partitions
+# match too, which only matters for totals, not for changes
+IO_DEVICES = ('mmcblk', 'sd', 'nvme')
+# Polls without disk I/O before the LED stops flashing, so short pauses in
+# activity don't make it flicker
+IO_IDLE_POLLS = 3
+# Uptime source
+UPTIME_FILE = '/proc/uptime'
+# Address only used to pick the outgoing interface, nothing is sent
+IP_PROBE_ADDRESS = ('8.8.8.8', 80)
+
+# Don't change without a reboot
+HOSTNAME = socket.gethostname()
+KERNEL = os.uname().release
+
+# Balancing LED responsiveness, and resource consumption. Default: 1.0s
 POLLING_INTERVAL = args.interval
-# Button responsiveness when screen is active
-ACTIVE_INTERVAL = 0.1
 
 # Whether to display startup screen. Default: True
 STARTUP_DISPLAY = args.startup
@@ -105,11 +110,8 @@ STARTUP_DISPLAY = args.startup
 ACTION_INITIAL_TIMEOUT = 10
 # oled timer between button actions
 ACTION_TIMEOUT = args.timer
-# Time considered a long press
-ACTION_PRESS = timedelta(seconds=2)
-# the countdown timer after a button press
-action_time = ACTION_INITIAL_TIMEOUT
-action_cancel = False
+# Seconds the button must be held to count as a long press
+ACTION_PRESS = 2.0
 
 # Countdown before executing a reboot/shutdown
 REBOOT_COUNTDOWN = 6
@@ -119,11 +121,26 @@ SHUTDOWN_COUNTDOWN = 6
 MENU = ["INFO", "INFO2", "CLOCK", "REBOOT", "SHUTDOWN"]
 menu_state = None
 
-# Tracking button events
-button_down_start = None
-button_down_last = None
-# Flag indicating a short button press/release 
-button_clicked = False
+# Running reboot/shutdown countdown task
+countdown_task = None
+# time.monotonic() at which the oled is blanked, pushed back on each release
+action_deadline = None
+# Queue of button events for main(), created once the event loop runs. None
+# only wakes main() to recheck the oled timeout
+events = None
+# Task redrawing the clock while CLOCK is on screen
+clock_task = None
+# Task flashing the LED on disk I/O
+io_task = None
+# Whether the button is down, as of the last event handled
+button_pressed = False
+# Flag indicating the current press was consumed by a hold or a cancel, so
+# the release must not advance the menu
+button_consumed = False
+
+led = PWMLED(args.led)
+# gpiozero debounces the button and fires its callbacks from its own thread
+button = Button(args.button, hold_time=ACTION_PRESS, hold_repeat=False, bounce_time=0.05)
 
 # Create the I2C interface
 i2c = busio.I2C(SCL, SDA)
@@ -141,14 +158,19 @@ oled.show()
 # LED resting brightness
 led_resting  = 0.25
 
-# Create blank image for drawing
-# Make sure to create image with mode '1' for 1-bit color
+# The frame is kept as one int per pixel column, bit n being pixel row n.
+# The SSD1306 packs 8 rows per byte ("page"), so a 128x32 frame is 4 pages
+# of 128 bytes
 width = oled.width
 height = oled.height
-image = Image.new("1", (width, height))
-
-# Get drawing object to draw on image
-draw = ImageDraw.Draw(image)
+PAGES = height // 8
+# SSD1306 commands limiting which part of its RAM the next data write fills
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+# Control byte sent ahead of display data over I2C
+I2C_DATA = b"\x40"
+COLUMN_MASK = (1 << height) - 1
+frame = [0] * width
 
 # First define some constants to allow easy resizing of shapes
 padding = -2
@@ -157,201 +179,406 @@ bottom = height - padding
 
 # Load default font
 font = ImageFont.load_default()
-# this font is included with Rasberry Pi OS
-font_large = ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSansMono-Bold.ttf", 24)
-
-# anything that changes the display
-def oled_display(state="", count=0):
-    # Draw a black filled box to clear the image.
-    draw.rectangle((0, 0, width, height), outline=0, fill=0)
-
+# Distance between text lines in pixels
+LINE_HEIGHT = 12
+
+# A character rasterized by PIL, as the offset of its first column from the
+# pen position, its column bitmasks, and how far it moves the pen. Each
+# character is only rasterized the first time it is drawn in a font
+@functools.lru_cache(maxsize=None)
+def glyph(glyph_font, char):
+    left, _, right, bottom = glyph_font.getbbox(char, mode="1")
+    left = min(left, 0)
+    glyph_image = Image.new("1", (max(right - left, 1), max(bottom, 1)))
+    ImageDraw.Draw(glyph_image).text((-left, 0), char, font=glyph_font, fill=255)
+    pixels = glyph_image.load()
+    columns = tuple(sum(1 << y for y in range(glyph_image.height) if pixels[x, y])
+                    for x in range(glyph_image.width))
+    return left, columns, glyph_font.getlength(char, mode="1")
+
+def text_width(text, text_font):
+    return sum(glyph(text_font, char)[2] for char in text)
+
+# OR text into the columns of target, with its top left corner at xy
+def draw_text(target, xy, text, text_font=font):
+    x, y = xy
+    for char in text:
+        left, columns, advance = glyph(text_font, char)
+        start = round(x + left)
+        for column, bits in enumerate(columns, start):
+            if 0 <= column < width:
+                target[column] |= bits << y if y >= 0 else bits >> -y
+        x += advance
+
+# Draw lines LINE_HEIGHT pixels apart
+def draw_lines(target, xy, *lines):
+    x, y = xy
+    for line in lines:
+        draw_text(target, (x, y), line)
+        y += LINE_HEIGHT
+
+# Outline a rectangle, corners included
+def draw_box(target, x0, y0, x1, y1):
+    edge = ((1 << (y1 - y0 + 1)) - 1) << y0
+    for column in range(x0, x1 + 1):
+        target[column] |= edge if column in (x0, x1) else (1 << y0) | (1 << y1)
+
+# Only CLOCK uses the large font, so it is loaded the first time CLOCK is
+# shown. This font is included with Rasberry Pi OS, if it can't be read the
+# clock falls back to the default font
+@functools.lru_cache(maxsize=None)
+def font_large():
+    try:
+        return ImageFont.truetype("/usr/share/fonts/dejavu/DejaVuSansMono-Bold.ttf", 24)
+    except OSError:
+        logging.warning("could not load the clock font, using the default font", exc_info=True)
+        return font
+
+# CLOCK line widths for centering. font_large is monospaced, so every
+# HH:MM:SS is as wide as 00:00:00
+@functools.lru_cache(maxsize=None)
+def clock_width():
+    return text_width("00:00:00", font_large())
+
+# Only a couple of timezone abbreviations ever show up (e.g. CET and CEST)
+@functools.lru_cache(maxsize=None)
+def zone_width(zone):
+    return text_width(zone, font)
+
+# The first cpu_percent() call has nothing to compare against and returns
+# 0.0, so take it now; later calls report usage since the previous one
+psutil.cpu_percent(interval=None)
+
+# CPU and memory usage in percent, sampled together for one redraw
+# Examples of getting system information from psutil : https://www.thepythoncode.com/article/get-hardware-system-information-python#CPU_info
+def sample():
+    return psutil.cpu_percent(interval=None), psutil.virtual_memory().percent
+
+# Seconds as "1d 2h 3m", leaving out leading zero units like `uptime -p`
+def format_uptime(seconds):
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+# Screens that don't change between redraws. The countdown screens leave out
+# the counter, which is drawn at COUNT_X on top of the copied frame
+def static_frame(state):
+    static = [0] * width
     if state == "STARTUP":
         # Startup Info
-        draw.rectangle((1,1,width-3,height-2), outline=1, fill=0)
-        draw.text((6, top+6),  "Loading Info Screen", font=font, fill=255)
-        draw.text((6, top+18), "Version: "+VERSION, font=font, fill=255)
-    if state  == "INFO":
-        # Shell scripts for system monitoring from here : https://unix.stackexchange.com/questions/119126/command-to-oledlay-memory-usage-disk-usage-and-cpu-load
-        cmd = "hostname"
-        HOSTNAME = subprocess.check_output(cmd, shell = True)
-        cmd = "hostname -I | cut -d\' \' -f1"
-        IP = subprocess.check_output(cmd, shell = True )
-
-        # Examples of getting system information from psutil : https://www.thepythoncode.com/article/get-hardware-system-information-python#CPU_info
-        CPU = "{:3.0f}".format(psutil.cpu_percent())
-        svmem = psutil.virtual_memory()
-        MemUsage = "{:2.0f}".format(svmem.percent)
-
-        hostName = "{:>16}".format(HOSTNAME.decode('UTF-8'))
-        ipAddress = "{:>16}".format(IP.decode('UTF-8'))
-
-        draw.text((0, top),      "NAME: " + hostName, font=font, fill=255)
-        draw.text((0, top+12),   "IP  : " + ipAddress,  font=font, fill=255)
-        draw.text((0, top+24),   "CPU : " + CPU + "% | MEM: " + MemUsage + "%", font=font, fill=255)
-    if state == "INFO2":
-        cmd = "uptime -p"
-        UPTIME_P = subprocess.check_output(cmd, shell = True)
-        upTime = format(UPTIME_P.decode('UTF-8'))
-        replace_list = {"up ": "", " days,": "d", " hours,": "h", " minutes": "m"}
-        for char in replace_list.keys():
-            upTime = re.sub(char, replace_list[char], upTime)
-        upTime = "{:>15}".format(upTime)
-
-        cmd = "uptime"
-        UPTIME = subprocess.check_output(cmd, shell = True)
-        load = format(UPTIME.decode('UTF-8'))
-        load = re.sub(r'^.*?load average:', '', load)
-        load = re.sub(",", "", load)
-        load = "{:>17}".format(load)
-
-        cmd = "uname -r"
-        KERNEL = subprocess.check_output(cmd, shell = True)
-        kernel = format(KERNEL.decode('UTF-8'))
-        kernel = "{:>20}".format(kernel)
-
-        draw.text((0, top),      "UPTIME:" + upTime, font=font, fill=255)
-        draw.text((0, top+12),   "LOAD:" + load, font=font, fill=255)
-        draw.text((0, top+24),   "K:" + kernel, font=font, fill=255)
-    if state == "CLOCK":
-        timestamp = time.strftime('%H:%M:%S')
-        timezone = tzlocal.get_localzone_name()
-        w = draw.textlength(timestamp, font_large)
-        draw.text(((width-w)/2, top),      timestamp, font=font_large, fill=255)
-        w = draw.textlength(timezone, font)
-        draw.text(((width-w)/2, top+24),   timezone, font=font, fill=255)
+        draw_box(static, 1, 1, width-3, height-2)
+        draw_lines(static, (6, top+6),
+                   "Loading Info Screen",
+                   "Version: "+VERSION)
     if state == "REBOOT":
-        draw.text((0, top),      "       REBOOT?      ", font=font, fill=255)
-        draw.text((0, top+12),   "   Press and hold   ", font=font, fill=255)
-        draw.text((0, top+24),   "     to execute.    ", font=font, fill=255)
+        draw_lines(static, (0, top),
+                   "       REBOOT?      ",
+                   "   Press and hold   ",
+                   "     to execute.    ")
     if state == "REBOOTING":
-        draw.text((0, top),      " Rebooting...     "+str(count), font=font, fill=255)
-        draw.text((0, top+24),   " (press to cancle)  ", font=font, fill=255)
+        draw_lines(static, (0, top),
+                   " Rebooting...     ",
+                   "",
+                   " (press to cancle)  ")
     if state == "SHUTDOWN":
-        draw.text((0, top),      "     SHUTDOWN?      ", font=font, fill=255)
-        draw.text((0, top+12),   "   Press and hold   ", font=font, fill=255)
-        draw.text((0, top+24),   "     to execute.    ", font=font, fill=255)
+        draw_lines(static, (0, top),
+                   "     SHUTDOWN?      ",
+                   "   Press and hold   ",
+                   "     to execute.    ")
     if state == "SHUTTING_DOWN":
-        draw.text((0, top),      " Shutting Down... "+str(count), font=font, fill=255)
-        draw.text((0, top+24),   " (press to cancel)  ", font=font, fill=255)
-    oled.image(image)
-    oled.show()
-
-# Display "bootup" screen
-if STARTUP_DISPLAY:
-    oled_display("STARTUP")
-    led.pulse(0.4,0.4)
-    time.sleep(ACTION_INITIAL_TIMEOUT)
-oled_display()
-led.value = led_resting
-
-# Main loop
-while True:
-
-    # The button has been recently pressed
-    if action_time > 0:
-        time.sleep(ACTIVE_INTERVAL)
-        action_time -= ACTIVE_INTERVAL
-        # Catch if the timer dropped to zero
-        if action_time <= 0:
-            oled_display()
-            menu_state = None
-        logging.debug("action_time = %s", action_time)
+        draw_lines(static, (0, top),
+                   " Shutting Down... ",
+                   "",
+                   " (press to cancel)  ")
+    return static
+
+STATIC_FRAMES = {state: static_frame(state)
+                 for state in ("STARTUP", "REBOOT", "REBOOTING", "SHUTDOWN", "SHUTTING_DOWN")}
+COUNT_X = {"REBOOTING":     text_width(" Rebooting...     ", font),
+           "SHUTTING_DOWN": text_width(" Shutting Down... ", font)}
+
+# The last frame sent to the oled, and the time shown if it was the clock.
+# The oled was cleared at start, so it begins as a blank frame
+last_frame = bytes(width * PAGES)
+last_timestamp = None
+
+# The frame in the SSD1306 layout: page by page, one byte per column with
+# its top row in the lowest bit
+def pack():
+    data = b"".join((bits & COLUMN_MASK).to_bytes(PAGES, "little") for bits in frame)
+    return b"".join(data[page::PAGES] for page in range(PAGES))
+
+# Write pages first to last of a packed frame into the oled's RAM. The
+# driver sets the oled to horizontal addressing, so the write wraps from one
+# page to the next
+def write_pages(packed, first, last):
+    for cmd in (SET_COL_ADDR, 0, width - 1, SET_PAGE_ADDR, first, last):
+        oled.write_cmd(cmd)
+    with oled.i2c_device:
+        oled.i2c_device.write(I2C_DATA + packed[first * width:(last + 1) * width])
+
+# Send the pages of the frame that differ from what the oled shows. A full
+# frame is 512 bytes over I2C, while a CLOCK tick only touches the pages of
+# its time line. Neighbouring changed pages go out in one write
+def oled_show():
+    global last_frame
+    packed = pack()
+    dirty = [packed[page * width:(page + 1) * width] != last_frame[page * width:(page + 1) * width]
+             for page in range(PAGES)]
+    last_frame = packed
+    page = 0
+    while page < PAGES:
+        if not dirty[page]:
+            page += 1
+            continue
+        first = page
+        while page < PAGES and dirty[page]:
+            page += 1
+        write_pages(packed, first, page - 1)
+
+def clear():
+    frame[:] = [0] * width
+
+def render_static(state, count):
+    # Overwrites the whole frame, no need to clear it first
+    frame[:] = STATIC_FRAMES[state]
+    if state in COUNT_X:
+        draw_text(frame, (COUNT_X[state], top), str(count))
+
+def render_info(count):
+    clear()
+    # The address of the interface a UDP socket would route through
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(IP_PROBE_ADDRESS)
+            IP = s.getsockname()[0]
+    except OSError:
+        IP = ""
+
+    cpu, mem = sample()
+    CPU = "{:3.0f}".format(cpu)
+    MemUsage = "{:2.0f}".format(mem)
+
+    hostName = "{:>16}".format(HOSTNAME)
+    ipAddress = "{:>16}".format(IP)
+
+    draw_lines(frame, (0, top),
+               "NAME: " + hostName,
+               "IP  : " + ipAddress,
+               "CPU : " + CPU + "% | MEM: " + MemUsage + "%")
+
+def render_info2(count):
+    clear()
+    # First field is the seconds since boot
+    with open(UPTIME_FILE) as f:
+        upTime = "{:>15}".format(format_uptime(float(f.read().split()[0])))
+
+    load = "{:>17}".format("{:.2f} {:.2f} {:.2f}".format(*os.getloadavg()))
+
+    kernel = "{:>20}".format(KERNEL)
+
+    draw_lines(frame, (0, top),
+               "UPTIME:" + upTime,
+               "LOAD:" + load,
+               "K:" + kernel)
+
+def render_clock(count):
+    global last_timestamp
+    timestamp = time.strftime('%H:%M:%S')
+    # The frame still holds this second's clock
+    if timestamp == last_timestamp:
+        return
+    last_timestamp = timestamp
+    clear()
+    draw_text(frame, ((width-clock_width())/2, top), timestamp, font_large())
+    # The abbreviation in effect now, so it follows DST changes
+    zone = time.localtime().tm_zone
+    draw_text(frame, ((width-zone_width(zone))/2, top+24), zone)
+
+# oled_display states and the functions drawing them. Any other state,
+# usually "", blanks the oled
+RENDERERS = {"INFO": render_info,
+             "INFO2": render_info2,
+             "CLOCK": render_clock}
+RENDERERS.update({state: functools.partial(render_static, state) for state in STATIC_FRAMES})
+
+# anything that changes the display
+def oled_display(state="", count=0):
+    global last_timestamp
+    # Any other screen overwrites the clock, so it is drawn in full next time
+    if state != "CLOCK":
+        last_timestamp = None
+
+    renderer = RENDERERS.get(state)
+    if renderer is None:
+        clear()
+    else:
+        renderer(count)
+    oled_show()
+
+# Nothing awaits the background tasks, so log their errors as they happen
+def report_task_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.error("task %s failed", task.get_coro().__name__, exc_info=task.exception())
+
+def start_task(coro):
+    task = asyncio.create_task(coro)
+    task.add_done_callback(report_task_error)
+    return task
+
+def countdown_running():
+    return countdown_task is not None and not countdown_task.done()
+
+# Count down on the oled, then run cmd. Cancelling the task aborts it
+async def countdown(state, count, cmd):
+    global action_deadline
+    # Ticks are scheduled from the start, so drawing time doesn't add up
+    start = time.monotonic()
+    for tick in range(count):
+        oled_display(state, count - tick)
+        await asyncio.sleep(start + tick + 1 - time.monotonic())
+    # Clear the screen and replace this process with the command. Only
+    # returns if the exec failed, then go back to the menu
+    oled_display()
+    try:
+        os.execvp(cmd[0], cmd)
+    except OSError:
+        logging.error("could not run %s", " ".join(cmd), exc_info=True)
+        oled_display(MENU[menu_state])
+        # main() waits without a timeout while the countdown runs
+        action_deadline = time.monotonic() + ACTION_TIMEOUT
+        events.put_nowait(None)
+
+def on_press():
+    global menu_state, button_pressed, button_consumed, countdown_task
+    button_pressed = True
+    # A press during a countdown cancels it
+    if countdown_running():
+        logging.debug("countdown cancelled")
+        countdown_task.cancel()
+        countdown_task = None
+        oled_display(MENU[menu_state])
+        button_consumed = True
+    # A press on the blank oled wakes it with the first menu screen right
+    # away, and the release must not move past it
+    elif menu_state is None:
+        logging.debug("menu_state set to 0 on wake")
+        menu_state = 0
+        oled_display(MENU[menu_state])
+        button_consumed = True
+
+def on_hold():
+    global countdown_task, button_consumed
+    if button_consumed or menu_state is None:
+        return
+    if MENU[menu_state] == "REBOOT":
+        state, count, cmd = "REBOOTING", REBOOT_COUNTDOWN, ["sudo", "reboot", "now"]
+    elif MENU[menu_state] == "SHUTDOWN":
+        state, count, cmd = "SHUTTING_DOWN", SHUTDOWN_COUNTDOWN, ["sudo", "shutdown", "now"]
+    else:
+        return
+    button_consumed = True
+    countdown_task = start_task(countdown(state, count, cmd))
+
+def on_release():
+    global menu_state, button_pressed, button_consumed, action_deadline
+    button_pressed = False
+    action_deadline = time.monotonic() + ACTION_TIMEOUT
+    if button_consumed:
+        button_consumed = False
+        return
+    if menu_state is None or menu_state == len(MENU) - 1:
+        logging.debug("menu_state MAX reset from %s", len(MENU)-1)
+        menu_state = 0
     else:
-        # Check if there has been I/O activity
-        s = open(IOFILE,mode='r')
-        io = s.read()
-        disk_active = False
-        for l in io.split('\n'):
-            try:
-                if int(l.split()[IO_FIELD - 1]):
-                    disk_active = True
-                    break
-            except IndexError:
-                pass
-        if disk_active:
-            # Fake disk activity flashing
-            led.pulse(0.1,0.1)
+        logging.debug("menu_state iterated from %s to %s", menu_state, menu_state+1)
+        menu_state += 1
+    oled_display(MENU[menu_state])
+
+BUTTON_EVENTS = {"press": on_press, "hold": on_hold, "release": on_release}
+
+# Reads and writes completed so far, over all disks
+def disk_ios():
+    return sum(counters.read_count + counters.write_count
+               for name, counters in psutil.disk_io_counters(perdisk=True).items()
+               if name.startswith(IO_DEVICES))
+
+# Redraw the clock at the start of every second
+async def clock_ticker():
+    while True:
+        await asyncio.sleep(1 - time.time() % 1)
+        oled_display("CLOCK")
+
+# Run clock_ticker() only while CLOCK is on screen
+def update_clock_task():
+    global clock_task
+    clock_shown = menu_state is not None and MENU[menu_state] == "CLOCK"
+    if clock_shown and clock_task is None:
+        clock_task = start_task(clock_ticker())
+    elif not clock_shown and clock_task is not None:
+        clock_task.cancel()
+        clock_task = None
+
+# Flash the LED while disk I/O completes between polls
+async def io_monitor():
+    ios = disk_ios()
+    # main() leaves the LED resting
+    idle_polls = IO_IDLE_POLLS
+    while True:
+        await asyncio.sleep(POLLING_INTERVAL)
+        last_ios, ios = ios, disk_ios()
+        if ios != last_ios:
+            if idle_polls >= IO_IDLE_POLLS:
+                # Fake disk activity flashing
+                led.pulse(0.1,0.1)
+            idle_polls = 0
         else:
-            led.value = led_resting
-        time.sleep(POLLING_INTERVAL)
-    
-    while button.is_pressed:
-        # Record the latest time while pressed & and the first time while pressed 
-        button_down = datetime.now()
-        if button_down_start is None:
-            button_down_start = button_down
-            logging.debug("button_down_start = %s", button_down_start)
-        # There needs to be a delay to avoid reading multiple signals when button is depressed
-        time.sleep(0.05)
-        # Start with the info screen
-        if action_time <= 0:
-            oled_display("INFO")
-        # Reset the action count down
-        action_time = ACTION_TIMEOUT
-        # Duration the button was depressed
-        press_delta = button_down - button_down_start
-        logging.debug("press_delta = %s", press_delta)
-
-        # If the button was held down long enough, interupt the menu 
-        if not action_cancel and press_delta > ACTION_PRESS:
-            if MENU[menu_state] == "REBOOT":
-                time.sleep(1)
-                count = REBOOT_COUNTDOWN
-                # Begin countdown
-                while count > 0:
-                    oled_display("REBOOTING", count)
-                    count -= 1
-                    time.sleep(1)
-                    if button.is_pressed:
-                        action_cancel = True
-                        break
-                # Set the correct menu state for the next main loop oled_display
-                if action_cancel:
-                    menu_state = MENU.index("REBOOT")-1
-                # Clear the screen, execute reboot, and exit the program
-                else:
-                    oled_display()
-                    cmd = "sudo reboot now"
-                    subprocess.Popen(cmd, shell = True)
-                    exit()
-            if MENU[menu_state] == "SHUTDOWN":
-                time.sleep(1)
-                count = SHUTDOWN_COUNTDOWN
-                # Begin countdown
-                while count > 0:
-                    oled_display("SHUTTING_DOWN", count)
-                    count -= 1
-                    time.sleep(1)
-                    if button.is_pressed:
-                        action_cancel = True
-                        break
-                # Set the correct menu state for the next main loop oled_display
-                if action_cancel:
-                    menu_state = MENU.index("SHUTDOWN")-1
-                # Clear the screen, execute shutdown, and exit the program
-                else:
-                    oled_display()
-                    cmd = "sudo shutdown now"
-                    subprocess.Popen(cmd, shell = True)
-                    exit()
+            idle_polls += 1
+            if idle_polls == IO_IDLE_POLLS:
+                led.value = led_resting
+
+async def main():
+    global menu_state, events, io_task
+    # Display "bootup" screen
+    if STARTUP_DISPLAY:
+        oled_display("STARTUP")
+        led.pulse(0.4,0.4)
+        await asyncio.sleep(ACTION_INITIAL_TIMEOUT)
+    oled_display()
+    led.value = led_resting
+
+    # Hand button events over from gpiozero's thread to the event loop
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    def post(event):
+        return lambda: loop.call_soon_threadsafe(events.put_nowait, event)
+    button.when_pressed = post("press")
+    button.when_held = post("hold")
+    button.when_released = post("release")
+
+    # Keep a reference so the task isn't garbage collected
+    io_task = start_task(io_monitor())
+
+    while True:
+        # Blank the oled once it has been left alone for ACTION_TIMEOUT
+        if menu_state is None or button_pressed or countdown_running():
+            timeout = None
         else:
-            # Flag indicating a short button press/release 
-            button_clicked = True
-
-    if button_clicked:
-        # Reset action cancel and click flags
-        action_cancel = False
-        button_clicked = False
-        
-        logging.debug("button_down = %s\n\n", button_down)
-        button_up = datetime.now()
-        logging.debug("button_up = %s", button_up)
-        button_down_start = None
-        button_down_last = button_down
-        if menu_state is None or menu_state == len(MENU) - 1:
-            logging.debug("menu_state MAX reset from %s", len(MENU)-1)
-            menu_state = 0
+            timeout = max(0, action_deadline - time.monotonic())
+        try:
+            event = await asyncio.wait_for(events.get(), timeout)
+        except asyncio.TimeoutError:
+            logging.debug("action timeout")
+            menu_state = None
+            oled_display()
         else:
-            logging.debug("menu_state iterated from %s to %s", menu_state, menu_state+1)
-            menu_state += 1
-        oled_display(MENU[menu_state])
+            if event is not None:
+                logging.debug("button %s", event)
+                BUTTON_EVENTS[event]()
+        update_clock_task()
+
+asyncio.run(main())